@@ -1,32 +1,49 @@
 import sifi_bridge_py as sbp
 import logging
 import time
+from itertools import chain
+
+import numpy as np
 
 from sifi_bridge_py.sifi_bridge import DeviceType
 
 
 def main():
     sb = sbp.SifiBridge()
-    while not sb.connect(DeviceType.BIOPOINT_V1_3):
-        continue
+    sb.connect(DeviceType.BIOPOINT_V1_3, retries=-1)
 
     kb = sb.start_memory_download()
     print(f"Start memory download for {kb} KB")
 
-    ecg_data = []
+    # Samples are at least 16-bit on-board, so this bounds the number of ECG samples
+    ecg_data = np.empty(int(kb) * 1024 // 2, dtype=np.float32)
+    n_samples = 0
     pkt_number = 0
     t0 = time.time()
-    while True:
-        data = sb.get_data()
-        pkt_number += 1
-        if data["status"] == "MemoryDownloadCompleted":
-            break
-        elif data["packet_type"] == "ecg":
-            ecg_data.extend(data["data"]["ecg"])
+    done = False
+    while not done:
+        batch = sb.get_data_batch()
+        pkt_number += len(batch)
+        done = any(data["status"] == "MemoryDownloadCompleted" for data in batch)
+        # Gather the whole batch's samples and copy them into the buffer at once
+        chunk = list(
+            chain.from_iterable(
+                data["data"]["ecg"] for data in batch if data["packet_type"] == "ecg"
+            )
+        )
+        if n_samples + len(chunk) > len(ecg_data):
+            ecg_data = np.resize(ecg_data, 2 * (n_samples + len(chunk)))
+        ecg_data[n_samples : n_samples + len(chunk)] = chunk
+        n_samples += len(chunk)
+    ecg_data = ecg_data[:n_samples]
     dt = time.time() - t0
     print(f"Download throughput: {pkt_number*227 / (1000*dt):.2f} kBps")
     print(f"Downloaded {len(ecg_data)} samples of ECG in {dt:.2f} seconds")
 
+    # Binary dump, no per-sample text formatting. Load back with np.load()
+    np.save("ecg_data.npy", ecg_data)
+    print("Saved ECG samples to ecg_data.npy")
+
 
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
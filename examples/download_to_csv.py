@@ -8,8 +8,7 @@ from sifi_bridge_py.sifi_bridge import DeviceType
 def main():
     OUTPUT_DIR = "./"
     sb = sbp.SifiBridge(data_transport="csv://./")
-    while not sb.connect(DeviceType.BIOPOINT_V1_3):
-        continue
+    sb.connect(DeviceType.BIOPOINT_V1_3, retries=-1)
 
     kb = sb.start_memory_download()
     print(f"Start memory download for {kb} KB")
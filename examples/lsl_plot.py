@@ -122,8 +122,8 @@ class MarkerInlet(Inlet):
 def main_sifibridge():
     print("Starting Sifi Bridge thread")
     sb = sbp.SifiBridge(use_lsl=True)
-    while not sb.connect():
-        print("Waiting for connection...")
+    print("Waiting for connection...")
+    sb.connect(retries=-1)
     print("Sifi Bridge connected!")
     print(sb.set_channels(True, True, True, True, True))
     print(sb.start())
@@ -1,41 +1,48 @@
 import logging
+
 import matplotlib.pyplot as plt
+import numpy as np
 
-from sifi_bridge_py import SifiBridge, DeviceType
+from sifi_bridge_py import SifiBridge, DeviceType, utils
 
 
 def main():
     device_type = DeviceType.BIOPOINT_V1_3
 
     sb = SifiBridge()
-    while not sb.connect(device_type):
-        continue
+    sb.connect(device_type, retries=-1)
     sb.set_channels(emg=True)
     sb.configure_emg((20, 450), 60)
     sb.start()
 
-    emg_data = (
-        {f"emg{i}": [] for i in range(8)}
+    channels = (
+        [f"emg{i}" for i in range(8)]
         if device_type == DeviceType.BIOARMBAND
-        else {"emg": []}
+        else ["emg"]
     )
-    base_key = "emg0" if device_type == DeviceType.BIOARMBAND else "emg"
+    # One row per channel, filled by slices
+    emg_data = np.empty((len(channels), 16384), dtype=np.float32)
+    n_samples = 0
 
-    while len(emg_data[base_key]) < 10000:
+    while n_samples < 10000:
         new_data = sb.get_emg()
         print(f"Sampling rate: {new_data['sample_rate']:.2f}")
-        for e, v in new_data["data"].items():
-            emg_data[e].extend(v)
+        chunk = utils.get_data_array(new_data, channels)
+        k = chunk.shape[1]
+        if n_samples + k > emg_data.shape[1]:
+            emg_data = np.hstack((emg_data, np.empty_like(emg_data)))
+        emg_data[:, n_samples : n_samples + k] = chunk
+        n_samples += k
 
-    time = [i / new_data["sample_rate"] for i in range(len(emg_data[base_key]))]
+    time = np.arange(n_samples, dtype=np.float32) / new_data["sample_rate"]
 
     if device_type == DeviceType.BIOARMBAND:
         legend = [f"Channel {i}" for i in range(8)]
         for i in range(8):
-            plt.plot(time, emg_data[f"emg{i}"])
+            plt.plot(time, emg_data[i, :n_samples])
         plt.legend(legend)
     else:
-        plt.plot(time, emg_data[base_key])
+        plt.plot(time, emg_data[0, :n_samples])
 
     plt.ylabel("EMG (mV)")
     plt.xlabel("Time (s)")
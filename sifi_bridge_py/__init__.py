@@ -6,5 +6,8 @@ from .sifi_bridge import (
     MemoryMode,  # noqa
     PpgSensitivity,  # noqa
     ListSources,  # noqa
+    PacketType,  # noqa
+    PacketsTimeoutError,  # noqa
+    PacketsBrokenPipeError,  # noqa
     SifiBridge,  # noqa
 )
@@ -0,0 +1,55 @@
+"""
+Hot paths of the stdout reader, kept free of `SifiBridge` state.
+
+Every function is fully annotated with concrete types, so that this module can be compiled on its own (e.g. `mypyc sifi_bridge_py/_reader.py`). The pure-Python module is used as is when no compiled version is installed.
+"""
+
+import io
+from typing import Callable
+
+
+def read_lines(
+    raw: io.RawIOBase, on_lines: Callable[[list[bytes]], None], size: int
+) -> None:
+    """
+    Read `raw` in large chunks until EOF and call `on_lines` with every burst of complete lines, without their newlines.
+
+    Reads go straight into a preallocated buffer of `size` bytes, so only the bytes actually read are copied out.
+    A trailing partial line stays at the start of the buffer and the next read appends to it, so it is never concatenated into a new object.
+    """
+    buf: bytearray = bytearray(size)
+    view: memoryview = memoryview(buf)
+    tail: int = 0
+    while True:
+        if tail == len(buf):
+            # A single line fills the whole buffer: grow it
+            view.release()
+            buf.extend(bytes(len(buf)))
+            view = memoryview(buf)
+        try:
+            n: int = raw.readinto(view[tail:]) or 0
+        except OSError:
+            n = 0
+        if not n:
+            return
+        filled: int = tail + n
+        end: int = buf.rfind(b"\n", tail, filled)
+        if end < 0:
+            tail = filled
+            continue
+        lines: list[bytes] = view[:end].tobytes().split(b"\n")
+        tail = filled - end - 1
+        view[:tail] = view[end + 1 : filled]
+        on_lines(lines)
+
+
+def has_key_path(packet: dict, keys: tuple[str, ...]) -> bool:
+    """
+    Check if `packet` has the nested keys `keys`, e.g. `packet[keys[0]][keys[1]]`. Walks the packet in place, without copying it.
+    """
+    node: object = packet
+    for k in keys:
+        if not isinstance(node, dict) or k not in node:
+            return False
+        node = node[k]
+    return True
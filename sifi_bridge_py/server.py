@@ -0,0 +1,296 @@
+"""
+Share a single SiFi Bridge between several processes.
+
+One process runs `serve()`, which owns the `sifibridge` subprocess and decodes its output once. Any number of consumer processes then connect with `BridgeClient`: each subscriber gets its own copy of every data packet, and can send commands to the shared bridge.
+
+# Example
+
+```python
+# Server process
+>>> from sifi_bridge_py import server
+>>> server.serve(authkey=b"secret")
+
+# Consumer processes
+>>> client = server.BridgeClient(authkey=b"secret")
+>>> client.call("connect")
+>>> client.call("start")
+>>> packet = client.get_data()
+```
+"""
+
+import itertools
+import logging
+import queue
+import threading
+from multiprocessing.managers import BaseManager
+
+from sifi_bridge_py.sifi_bridge import SifiBridge
+
+_log = logging.getLogger(__name__)
+
+DEFAULT_ADDRESS = ("127.0.0.1", 50000)
+"""
+Address the server listens on by default. Any `multiprocessing` address is accepted, e.g. a Unix socket path.
+"""
+
+_SUBSCRIBER_QUEUE_SIZE = 4096
+"""
+Maximum number of packets queued for each subscriber. When a subscriber falls behind, its oldest packets are dropped first.
+"""
+
+_CONTROL_METHODS = frozenset(
+    name
+    for name in dir(SifiBridge)
+    if not name.startswith(("_", "get_"))
+    and name not in ("batch", "close", "start_memory_download")
+)
+"""
+`SifiBridge` methods that clients may call through `BridgeClient.call()`. Methods that read data packets themselves are excluded: data is only read by the server, which fans it out to subscribers. So is `close()`, the bridge belongs to the server.
+"""
+
+
+class _Hub:
+    """
+    Server-side state: the shared bridge and one packet queue per subscriber.
+    """
+
+    def __init__(self, bridge: SifiBridge, queue_size: int):
+        self._bridge = bridge
+        self._bridge_lock = threading.Lock()
+        self._queue_size = queue_size
+        self._subscribers: dict[int, queue.Queue] = {}
+        self._subscribers_lock = threading.Lock()
+        self._ids = itertools.count()
+        self._closed = False
+
+        threading.Thread(target=self._fan_out, daemon=True).start()
+
+    def subscribe(self) -> int:
+        """Create a packet queue for a new subscriber.
+
+        :return: Subscriber ID.
+        """
+        with self._subscribers_lock:
+            sid = next(self._ids)
+            subscriber = queue.Queue(self._queue_size)
+            if self._closed:
+                subscriber.put(None)
+            self._subscribers[sid] = subscriber
+        return sid
+
+    def unsubscribe(self, sid: int):
+        """Drop the packet queue of subscriber `sid`."""
+        with self._subscribers_lock:
+            self._subscribers.pop(sid, None)
+
+    def get(self, sid: int, timeout: float | None = None) -> dict:
+        """Pop the oldest packet queued for subscriber `sid`.
+
+        :raise ValueError: If `sid` is not subscribed.
+        :raise TimeoutError: If no packet was received within `timeout`.
+        :raise BrokenPipeError: If SiFi Bridge exited and no more packets are queued.
+        """
+        subscriber = self._subscriber(sid)
+        try:
+            packet = subscriber.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError("No data received from SiFi Bridge") from None
+        if packet is None:
+            # Leave the end-of-stream sentinel for the next call
+            subscriber.put(None)
+            raise BrokenPipeError("SiFi Bridge is not running")
+        return packet
+
+    def get_batch(
+        self, sid: int, max_n: int = 64, timeout: float | None = None
+    ) -> list[dict]:
+        """Wait for at least one packet for subscriber `sid`, then pop every queued packet, up to `max_n`.
+
+        :raise ValueError: If `sid` is not subscribed.
+        :raise TimeoutError: If no packet was received within `timeout`.
+        :raise BrokenPipeError: If SiFi Bridge exited and no more packets are queued.
+        """
+        subscriber = self._subscriber(sid)
+        packets = [self.get(sid, timeout)]
+        while len(packets) < max_n:
+            try:
+                packet = subscriber.get_nowait()
+            except queue.Empty:
+                break
+            if packet is None:
+                subscriber.put(None)
+                break
+            packets.append(packet)
+        return packets
+
+    def _subscriber(self, sid: int) -> queue.Queue:
+        """Packet queue of subscriber `sid`.
+
+        :raise ValueError: If `sid` is not subscribed, e.g. its client was closed.
+        """
+        with self._subscribers_lock:
+            subscriber = self._subscribers.get(sid)
+        if subscriber is None:
+            raise ValueError(f"Subscriber {sid} is not subscribed")
+        return subscriber
+
+    def call(self, method: str, args: tuple, kwargs: dict):
+        """Call `SifiBridge` method `method` on the shared bridge.
+
+        :raise AttributeError: If `method` is not a control method.
+        """
+        if method not in _CONTROL_METHODS:
+            raise AttributeError(f"SifiBridge.{method} can't be called remotely")
+        with self._bridge_lock:
+            return getattr(self._bridge, method)(*args, **kwargs)
+
+    def _fan_out(self):
+        """Fan-out thread. Copy every packet read from the bridge to every subscriber's queue."""
+        while True:
+            try:
+                packets = self._bridge.get_data_batch()
+            except BrokenPipeError:
+                _log.info("SiFi Bridge exited, stopping fan-out.")
+                break
+            with self._subscribers_lock:
+                subscribers = list(self._subscribers.values())
+            for subscriber in subscribers:
+                for packet in packets:
+                    _put_dropping_oldest(subscriber, packet)
+
+        # Wake up the blocked subscribers with an end-of-stream sentinel
+        with self._subscribers_lock:
+            self._closed = True
+            for subscriber in self._subscribers.values():
+                _put_dropping_oldest(subscriber, None)
+
+
+def _put_dropping_oldest(subscriber: queue.Queue, item):
+    """
+    Queue `item` for `subscriber`. If a lagging subscriber's queue is full, make room by dropping its oldest packet.
+    """
+    while True:
+        try:
+            subscriber.put_nowait(item)
+            return
+        except queue.Full:
+            try:
+                subscriber.get_nowait()
+            except queue.Empty:
+                pass
+
+
+class _HubManager(BaseManager):
+    pass
+
+
+_HubManager.register("hub")
+
+
+def serve(
+    authkey: bytes,
+    address=DEFAULT_ADDRESS,
+    queue_size: int = _SUBSCRIBER_QUEUE_SIZE,
+    **bridge_kwargs,
+):
+    """
+    Run a SiFi Bridge and serve its packets to `BridgeClient`s until the process is interrupted. Blocking operation.
+
+    :param authkey: Secret that clients must present to connect.
+    :param address: Address to listen on. See `DEFAULT_ADDRESS`.
+    :param queue_size: Maximum number of packets queued for each subscriber. The oldest are dropped first.
+    :param bridge_kwargs: Keyword arguments forwarded to `SifiBridge()`.
+    """
+    hub = _Hub(SifiBridge(**bridge_kwargs), queue_size)
+
+    class _ServerManager(BaseManager):
+        pass
+
+    _ServerManager.register("hub", callable=lambda: hub)
+
+    _log.info("Serving SiFi Bridge on %s", address)
+    _ServerManager(address=address, authkey=authkey).get_server().serve_forever()
+
+
+class BridgeClient:
+    """
+    Consumer of a SiFi Bridge shared by `serve()`, possibly in another process.
+
+    Each client is a separate subscriber: it receives every data packet read after it connected, regardless of other clients.
+    """
+
+    def __init__(self, authkey: bytes, address=DEFAULT_ADDRESS):
+        """
+        Connect to a server started with `serve()`.
+
+        :param authkey: Secret given to `serve()`.
+        :param address: Address the server listens on.
+        """
+        self._manager = _HubManager(address=address, authkey=authkey)
+        self._manager.connect()
+        self._hub = self._manager.hub()
+        self._sid = self._hub.subscribe()
+
+    def call(self, method: str, *args, **kwargs):
+        """
+        Call a control method of the shared `SifiBridge`, such as `connect` or `configure_emg`, and return its result.
+
+        Calls from all clients are serialized, so concurrent configurations don't interleave.
+
+        :raise AttributeError: If `method` reads data (`get_*()`) or doesn't exist. Use this client's `get_data()` methods instead.
+        :raise ValueError: If the client is closed.
+        """
+        return self.__proxy().call(method, args, kwargs)
+
+    def get_data(self, timeout: float | None = None) -> dict:
+        """
+        Wait for the next packet. Blocking operation.
+
+        :param timeout: Maximum time to wait, in seconds. `None` to wait indefinitely.
+
+        :return: Packet as a dictionary.
+
+        :raise ValueError: If the client is closed.
+        :raise TimeoutError: If no packet was received within `timeout`.
+        :raise BrokenPipeError: If the shared SiFi Bridge exited and no more packets are queued.
+        """
+        return self.__proxy().get(self._sid, timeout)
+
+    def get_data_batch(
+        self, max_n: int = 64, timeout: float | None = None
+    ) -> list[dict]:
+        """
+        Wait for at least one packet, then return every queued packet, up to `max_n`. Blocking operation.
+
+        Costs a single round-trip to the server, which amortizes the IPC overhead on high-throughput streams.
+
+        :param max_n: Maximum number of packets to return.
+        :param timeout: Maximum time to wait for the first packet, in seconds. `None` to wait indefinitely.
+
+        :return: List of packets as dictionaries, oldest first.
+
+        :raise ValueError: If the client is closed.
+        :raise TimeoutError: If no packet was received within `timeout`.
+        :raise BrokenPipeError: If the shared SiFi Bridge exited and no more packets are queued.
+        """
+        return self.__proxy().get_batch(self._sid, max_n, timeout)
+
+    def __proxy(self):
+        """Proxy of the server's hub.
+
+        :raise ValueError: If the client is closed.
+        """
+        if self._hub is None:
+            raise ValueError("BridgeClient is closed")
+        return self._hub
+
+    def close(self):
+        """
+        Unsubscribe from the server and close the connection to it. The shared bridge keeps running. Calling it again does nothing.
+        """
+        if self._hub is None:
+            return
+        self._hub.unsubscribe(self._sid)
+        # Release the proxy's reference on the server, which also closes its connection
+        self._hub._close()
+        self._hub = None
@@ -1,11 +1,80 @@
 import subprocess as sp
-import json
+import asyncio
+import io
+import os
+import queue
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
 from typing import Iterable
 from enum import Enum
 
 import logging
 
+try:
+    # orjson and msgspec decode straight from bytes, several times faster than the standard library.
+    # Both also cache the short keys repeated in every packet instead of allocating them anew.
+    # orjson is a dependency, the fallbacks are for platforms without orjson wheels.
+    from orjson import loads as _loads
+except ImportError:
+    try:
+        from msgspec.json import decode as _loads
+    except ImportError:
+        from json import loads as _loads
+
 from sifi_bridge_py import utils
+from sifi_bridge_py._reader import has_key_path as _has_key_path, read_lines
+
+_log = logging.getLogger(__name__)
+
+_PIPE_SIZE = 1 << 20
+"""
+Requested kernel buffer size of SiFi Bridge's stdout pipe, in bytes.
+"""
+
+
+def _enlarge_pipe(fd: int, size: int):
+    """
+    Try to grow the kernel buffer of pipe `fd` to `size` bytes, so that SiFi Bridge does not block on writes while Python is busy.
+
+    Only supported on Linux. Does nothing on other platforms. If unprivileged processes are not allowed pipes that large, falls back to the largest allowed size (see `/proc/sys/fs/pipe-max-size`).
+    """
+    if sys.platform != "linux":
+        return
+
+    import fcntl
+
+    set_pipe_size = getattr(fcntl, "F_SETPIPE_SZ", 1031)
+    try:
+        fcntl.fcntl(fd, set_pipe_size, size)
+        return
+    except OSError as e:
+        _log.debug("Could not resize stdout pipe to %d bytes: %s", size, e)
+
+    try:
+        with open("/proc/sys/fs/pipe-max-size") as f:
+            max_size = int(f.read())
+        if max_size < size:
+            fcntl.fcntl(fd, set_pipe_size, max_size)
+    except (OSError, ValueError) as e:
+        _log.debug("Could not resize stdout pipe: %s", e)
+
+
+def _deadline(timeout: float | None) -> float | None:
+    """
+    Convert a relative `timeout` in seconds to an absolute `time.monotonic()` deadline. `None` means no deadline.
+    """
+    return None if timeout is None else time.monotonic() + timeout
+
+
+def _set_future_result(future: asyncio.Future):
+    """
+    Mark `future` as done, unless it was already cancelled (e.g. by a timeout).
+    """
+    if not future.done():
+        future.set_result(None)
 
 
 class PacketType(Enum):
@@ -35,6 +104,36 @@ class PacketType(Enum):
     TEMPERATURE = "temperature"
 
 
+# `packet_type` values accepted by each `SifiBridge.get_*()` method
+_ECG_PACKET_TYPES = frozenset((PacketType.ECG.value,))
+_EMG_PACKET_TYPES = frozenset((PacketType.EMG.value, PacketType.EMG_ARMBAND.value))
+_EDA_PACKET_TYPES = frozenset((PacketType.EDA.value,))
+_IMU_PACKET_TYPES = frozenset((PacketType.IMU.value,))
+_PPG_PACKET_TYPES = frozenset((PacketType.PPG.value,))
+_TEMPERATURE_PACKET_TYPES = frozenset((PacketType.TEMPERATURE.value,))
+
+# `packet_type` values accepted by `SifiBridge.get_packets()`, by requested packet type
+_SENSOR_PACKET_TYPES = {
+    PacketType.ECG: _ECG_PACKET_TYPES,
+    PacketType.EMG: _EMG_PACKET_TYPES,
+    PacketType.EMG_ARMBAND: _EMG_PACKET_TYPES,
+    PacketType.EDA: _EDA_PACKET_TYPES,
+    PacketType.IMU: _IMU_PACKET_TYPES,
+    PacketType.PPG: _PPG_PACKET_TYPES,
+    PacketType.TEMPERATURE: _TEMPERATURE_PACKET_TYPES,
+}
+
+_MAX_QUEUED_LINES = 1 << 16
+"""
+Maximum number of lines read from SiFi Bridge and waiting for `SifiBridge.get_data()`. The oldest are dropped first, with a warning.
+"""
+
+_SENSOR_BACKLOG_SIZE = 256
+"""
+Maximum number of packets of each type that `SifiBridge.get_*()` methods set aside for each other. The oldest are dropped first.
+"""
+
+
 class SensorChannel(Enum):
     """
     Sensor channel names as returned by `sifibridge`.
@@ -108,6 +207,14 @@ class DeviceCommand(Enum):
     STOP_STATUS_UPDATE = "stop-status-update"
 
 
+_COMMAND_BYTES = {
+    command: f"command {command.value}\n".encode() for command in DeviceCommand
+}
+"""
+Pre-encoded `command` lines sent by `SifiBridge.send_command()`.
+"""
+
+
 class DeviceType(Enum):
     """
     Use in tandem with SifiBridge.connect() to connect to SiFi Devices via BLE name.
@@ -161,6 +268,50 @@ class PpgSensitivity(Enum):
     MAX = "max"
 
 
+_SWITCH_TOKENS = (b"off", b"on")
+"""
+Pre-encoded switch arguments, indexed by the switch's boolean state.
+"""
+
+_CHANNELS_COMMANDS = tuple(
+    b"configure channels "
+    + b" ".join(_SWITCH_TOKENS[bits >> i & 1] for i in range(5))
+    + b"\n"
+    for bits in range(1 << 5)
+)
+"""
+Every `configure channels` line sent by `SifiBridge.set_channels()`, indexed by a bitmask of the enabled channels (bit 0 is ECG, then EMG, EDA, IMU, PPG).
+"""
+
+_FILTERING_COMMANDS = tuple(
+    b"configure filtering " + token + b"\n" for token in _SWITCH_TOKENS
+)
+"""
+`configure filtering` lines sent by `SifiBridge.set_filters()`, indexed by the switch's boolean state.
+"""
+
+_LOW_LATENCY_MODE_COMMANDS = tuple(
+    b"configure low-latency-mode " + token + b"\n" for token in _SWITCH_TOKENS
+)
+"""
+`configure low-latency-mode` lines sent by `SifiBridge.set_low_latency_mode()`, indexed by the switch's boolean state.
+"""
+
+_BLE_POWER_COMMANDS = {
+    power: f"configure ble-power {power.value}\n".encode() for power in BleTxPower
+}
+"""
+`configure ble-power` lines sent by `SifiBridge.set_ble_power()`.
+"""
+
+_MEMORY_MODE_COMMANDS = {
+    mode: f"configure memory {mode.value}\n".encode() for mode in MemoryMode
+}
+"""
+`configure memory` lines sent by `SifiBridge.set_memory_mode()`.
+"""
+
+
 class ListSources(Enum):
     """
     Use in tandem with SifiBridge.list_devices() to list devices from different sources.
@@ -171,6 +322,165 @@ class ListSources(Enum):
     DEVICES = "devices"
 
 
+class PacketsTimeoutError(TimeoutError):
+    """
+    Raised by `SifiBridge.get_packets()` when fewer packets than requested were received within the timeout.
+    """
+
+    def __init__(self, message: str, packets: list[dict]):
+        super().__init__(message)
+        self.packets = packets
+        """Packets received before the timeout, oldest first."""
+
+
+class PacketsBrokenPipeError(BrokenPipeError):
+    """
+    Raised by `SifiBridge.get_packets()` when SiFi Bridge exited before all requested packets were received.
+    """
+
+    def __init__(self, message: str, packets: list[dict]):
+        super().__init__(message)
+        self.packets = packets
+        """Packets received before SiFi Bridge exited, oldest first."""
+
+
+class _Waiter:
+    """
+    A request waiting for its response. See `_Stdout.waiters`.
+    """
+
+    __slots__ = ("key", "needle", "responses", "abandoned")
+
+    def __init__(self, key: str):
+        self.key = key
+        """Top-level key of the expected response."""
+        self.needle = f'"{key}"'.encode()
+        """Quoted `key`, to skip decoding the lines that can't match."""
+        self.responses = queue.SimpleQueue()
+        """Receives the decoded response, or `None` if SiFi Bridge exited."""
+        self.abandoned = False
+        """True once the request timed out. See `_Stdout.route_responses()`."""
+
+
+class _Stdout:
+    """
+    SiFi Bridge's stdout, as seen by a `SifiBridge` and its reader thread.
+
+    The reader thread only references this object, never the `SifiBridge` itself, so that dropping the last reference to a `SifiBridge` still stops `sifibridge`.
+    """
+
+    lines: deque
+    """
+    Complete lines read from SiFi Bridge's stdout, waiting to be decoded by `get_data()`. When nobody consumes them, the oldest are dropped past `_MAX_QUEUED_LINES`.
+    """
+
+    waiters: deque
+    """
+    `_Waiter`s of the requests waiting for a response, oldest first.
+    """
+
+    def __init__(self):
+        self.lines = deque(maxlen=_MAX_QUEUED_LINES)
+        self.lines_ready = threading.Event()
+        self.lines_ready_async = []
+        self.closed = False
+        self.waiters = deque()
+        self.waiters_lock = threading.Lock()
+
+    def read(self, raw: io.RawIOBase):
+        """Reader thread. Read SiFi Bridge's stdout in large chunks and queue every complete line.
+
+        Reading in bulk costs one syscall per burst of packets instead of one per packet, and lets JSON decoding in `get_data()` overlap with the pipe I/O.
+        The raw pipe is read directly, bypassing the `BufferedReader`. See `_reader.read_lines()`.
+        """
+        try:
+            # Large enough to drain a full pipe in one call after a stall
+            read_lines(raw, self.queue_lines, _PIPE_SIZE)
+        finally:
+            # Even if the reader failed, nobody may be left waiting for lines that will never come
+            self.closed = True
+            self.notify_lines_ready()
+            with self.waiters_lock:
+                for waiter in self.waiters:
+                    waiter.responses.put(None)
+                self.waiters.clear()
+
+    def queue_lines(self, lines: list[bytes]):
+        """Route the responses among `lines` to their waiters and queue the other lines for `get_data()`."""
+        if self.waiters:
+            lines = self.route_responses(lines)
+        overflow = len(self.lines) + len(lines) - _MAX_QUEUED_LINES
+        if overflow > 0:
+            _log.warning(
+                "Nobody is reading SiFi Bridge's data, dropping %d packets.", overflow
+            )
+        self.lines.extend(lines)
+        self.notify_lines_ready()
+
+    def notify_lines_ready(self):
+        """Wake up the consumers waiting for lines, or for SiFi Bridge to exit."""
+        self.lines_ready.set()
+        if not self.lines_ready_async:
+            return
+        with self.waiters_lock:
+            futures, self.lines_ready_async = self.lines_ready_async, []
+        for future in futures:
+            try:
+                future.get_loop().call_soon_threadsafe(_set_future_result, future)
+            except RuntimeError:
+                # The consumer's event loop was closed in the meantime
+                pass
+
+    def route_responses(self, lines: list[bytes]) -> list[bytes]:
+        """Hand over the responses among `lines`, decoded, to the oldest waiter for their top-level key.
+
+        A key nested in some other packet, e.g. in a status packet's data, is not a response.
+
+        A waiter whose request timed out stays registered, so that its late response is discarded rather than mistaken for the response to a later request.
+        But as soon as a later request with the same key is waiting too, a response goes to the later request, and the abandoned waiters before it are dropped.
+        Thus a response that never comes can't shift every later response by one.
+
+        :return: Lines that were not routed to a waiter, in order.
+        """
+        with self.waiters_lock:
+            return [line for line in lines if not self.__route_response(line)]
+
+    def __route_response(self, line: bytes) -> bool:
+        """Hand over `line`, decoded, to a waiter for its top-level key, if any. Must be called with `waiters_lock` held.
+
+        :return: True if `line` was routed.
+        """
+        packet = None
+        abandoned = []
+        for waiter in self.waiters:
+            if waiter.needle not in line:
+                continue
+            if packet is None:
+                try:
+                    packet = _loads(line)
+                except Exception:
+                    # Each decoder raises its own error type, e.g. msgspec.DecodeError isn't a ValueError
+                    return False
+                if not isinstance(packet, dict):
+                    return False
+            if waiter.key not in packet:
+                continue
+            if waiter.abandoned:
+                abandoned.append(waiter)
+                continue
+            for stale in abandoned:
+                self.waiters.remove(stale)
+            break
+        else:
+            if not abandoned:
+                return False
+            # Late response to a request that timed out
+            waiter = abandoned[0]
+        self.waiters.remove(waiter)
+        waiter.responses.put(packet)
+        return True
+
+
 class SifiBridge:
     """
     Wrapper class over Sifi Bridge CLI tool. It is recommend to use it in a thread to avoid blocking on I/O.
@@ -181,6 +491,21 @@ class SifiBridge:
     SiFi Bridge executable instance.
     """
 
+    _batch: list[bytes] | None
+    """
+    Lines buffered by `batch()`, `None` outside of a batch.
+    """
+
+    _stdout: _Stdout
+    """
+    Lines read from SiFi Bridge's stdout and the commands waiting for a response, shared with the reader thread.
+    """
+
+    _sensor_backlogs: dict[str, deque]
+    """
+    Sensor packets skipped by a `get_*()` method, by `packet_type`, waiting for the matching `get_*()` method.
+    """
+
     active_device: str
 
     def __init__(
@@ -193,6 +518,7 @@ class SifiBridge:
         If it is, it checks if its version is compatible with the Python package.
         If they are incompatible OR `sifibridge` is not already in the directory, the latest compatible version is downloaded from the official Github repository.
         If they are compatible, no matter the patch version, the existing `sifibridge` is used.
+        Set the `SIFI_SKIP_VERSION_CHECK` environment variable to `1` or `true` to skip the version check and use the existing `sifibridge` as is.
 
         For more documentation about SiFi Bridge, see `sifibridge -h` or the interactive help: `sifibridge; help`
 
@@ -202,23 +528,19 @@ class SifiBridge:
 
         executable = "./sifibridge"
 
-        # Check if sifibridge in cwd
-        try:
-            cli_version = (
-                sp.run([executable, "-V"], stdout=sp.PIPE)
-                .stdout.decode()
-                .strip()
-                .split(" ")[-1]
-            )
-        except FileNotFoundError:
-            cli_version = "0.0.1"
-        py_version = utils._get_package_version()
+        skip_check = os.environ.get("SIFI_SKIP_VERSION_CHECK", "").strip().lower()
+        if skip_check in ("1", "true") and os.path.isfile(executable):
+            _log.debug("Skipping sifibridge version check.")
+        else:
+            # Check if sifibridge in cwd
+            cli_version = utils._get_cli_version(executable)
+            py_version = utils._get_package_version()
 
-        logging.debug(f"CLI version: {cli_version}, Python version: {py_version}")
+            _log.debug("CLI version: %s, Python version: %s", cli_version, py_version)
 
-        if not utils._are_compatible(cli_version, py_version):
-            logging.info("Downloading latest compatible version of sifibridge.")
-            executable = utils.get_sifi_bridge("./")
+            if not utils._are_compatible(cli_version, py_version):
+                _log.info("Downloading latest compatible version of sifibridge.")
+                executable = utils.get_sifi_bridge("./")
 
         exec_command = [executable]
 
@@ -233,8 +555,29 @@ class SifiBridge:
         if use_lsl:
             exec_command.append("--lsl")
 
-        logging.info(f"Launching executable: {' '.join(exec_command)}")
+        _log.info("Launching executable: %s", " ".join(exec_command))
         self._bridge = sp.Popen(exec_command, stdin=sp.PIPE, stdout=sp.PIPE)
+        _enlarge_pipe(self._bridge.stdout.fileno(), _PIPE_SIZE)
+
+        self._batch = None
+        self._batch_keys = []
+
+        self._sensor_backlogs = {
+            packet_type: deque(maxlen=_SENSOR_BACKLOG_SIZE)
+            for packet_type in _ECG_PACKET_TYPES
+            | _EMG_PACKET_TYPES
+            | _EDA_PACKET_TYPES
+            | _IMU_PACKET_TYPES
+            | _PPG_PACKET_TYPES
+            | _TEMPERATURE_PACKET_TYPES
+        }
+
+        self._stdout = _Stdout()
+        # The reader thread must not hold a reference to `self`, or `__del__` would never stop `sifibridge`
+        self._reader = threading.Thread(
+            target=self._stdout.read, args=(self._bridge.stdout.raw,), daemon=True
+        )
+        self._reader.start()
 
         self.active_device = self.get_data()["new"]["active"]
 
@@ -242,8 +585,7 @@ class SifiBridge:
         """
         Get information about the current SiFi Bridge device.
         """
-        self.__write("show")
-        return self.get_data_with_key("show")["show"]
+        return self.__request("show", "show")["show"]
 
     def create_device(self, name: str, select: bool = True):
         """
@@ -260,8 +602,7 @@ class SifiBridge:
             raise ValueError(f"Spaces are not supported in device name ({name})")
 
         old_active = self.active_device
-        self.__write(f"new {name}")
-        resp = self.get_data_with_key("new")
+        resp = self.__request(f"new {name}", "new")
         self.active_device = resp["new"]["active"]
         if not select:
             return self.select_device(old_active)
@@ -275,8 +616,7 @@ class SifiBridge:
 
         :return: Response from SiFi Bridge
         """
-        self.__write(f"select {name}")
-        resp = self.get_data_with_key("select")
+        resp = self.__request(f"select {name}", "select")
         self.active_device = resp["select"]["active"]
         return resp
 
@@ -286,10 +626,11 @@ class SifiBridge:
 
         :param name: Name of the manager to delete
 
-        :return: Response from SiFi Bridge
+        :return: Name of the newly active device
         """
-        self.__write(f"delete {name}")
-        return self.get_data_with_key("delete")["delete"]["active"]
+        resp = self.__request(f"delete {name}", "delete")
+        self.active_device = resp["delete"]["active"]
+        return self.active_device
 
     def list_devices(self, source: ListSources | str) -> list[str]:
         """
@@ -300,18 +641,24 @@ class SifiBridge:
         if isinstance(source, str):
             source = ListSources(source)
 
-        self.__write(f"list {source.value}")
-        return self.get_data_with_key("list")["list"]["devices"]
+        return self.__request(f"list {source.value}", "list")["list"]["devices"]
 
-    def connect(self, handle: DeviceType | str | None = None) -> bool:
+    def connect(
+        self,
+        handle: DeviceType | str | None = None,
+        retries: int = 0,
+        backoff: float = 0.25,
+    ) -> bool:
         """
-        Try to connect to `handle`.
+        Try to connect to `handle`, optionally retrying with an exponential backoff.
 
         :param handle: Device handle to connect to. Can be:
 
             - `None` to connect to any device
             - a `DeviceType` to connect by device name
             - a MAC (Windows/Linux) / UUID (MacOS) to connect to a specific device.
+        :param retries: Number of attempts after the first failed one. -1 to retry until connected.
+        :param backoff: Delay before the first retry, in seconds. Doubles after every failed retry, up to 5 seconds.
 
         :return: Connection status
         """
@@ -319,11 +666,21 @@ class SifiBridge:
         if isinstance(handle, DeviceType):
             handle = handle.value
 
-        self.__write(f"connect {handle if handle is not None else ''}")
-        ret = self.get_data_with_key("connect")["connect"]["connected"]
-        if ret is False:
-            logging.info(f"Could not connect to {handle}")
-        return ret
+        attempt = 0
+        delay = min(backoff, 5.0)
+        while True:
+            ret = self.__request(
+                f"connect {handle if handle is not None else ''}", "connect"
+            )["connect"]["connected"]
+            if ret is not False:
+                return ret
+            _log.info("Could not connect to %s", handle)
+            if retries >= 0 and attempt >= retries:
+                return ret
+            time.sleep(delay)
+            # Running delay rather than `backoff * 2**attempt`, which overflows when retrying forever
+            delay = min(delay * 2, 5.0)
+            attempt += 1
 
     def disconnect(self):
         """
@@ -331,8 +688,7 @@ class SifiBridge:
 
         :return: Connection status response
         """
-        self.__write("disconnect")
-        ret = self.get_data_with_key("disconnect")["disconnect"]["connected"]
+        ret = self.__request("disconnect", "disconnect")["disconnect"]["connected"]
         return ret
 
     def set_filters(self, enable: bool):
@@ -341,8 +697,7 @@ class SifiBridge:
 
         :return: Configuration response
         """
-        self.__write(f"configure filtering {'on' if enable else 'off'}")
-        return self.get_data_with_key("configure")
+        return self.__configure(_FILTERING_COMMANDS[bool(enable)])
 
     def set_channels(
         self,
@@ -357,14 +712,14 @@ class SifiBridge:
 
         :return: Configuration response
         """
-        ecg = "on" if ecg else "off"
-        emg = "on" if emg else "off"
-        eda = "on" if eda else "off"
-        imu = "on" if imu else "off"
-        ppg = "on" if ppg else "off"
-
-        self.__write(f"configure channels {ecg} {emg} {eda} {imu} {ppg}")
-        return self.get_data_with_key("configure")
+        bits = (
+            bool(ecg)
+            | bool(emg) << 1
+            | bool(eda) << 2
+            | bool(imu) << 3
+            | bool(ppg) << 4
+        )
+        return self.__configure(_CHANNELS_COMMANDS[bits])
 
     def set_ble_power(self, power: BleTxPower | str):
         """
@@ -377,8 +732,7 @@ class SifiBridge:
         if isinstance(power, str):
             power = BleTxPower(power)
 
-        self.__write(f"configure ble-power {power.value}")
-        return self.get_data_with_key("configure")
+        return self.__configure(_BLE_POWER_COMMANDS[power])
 
     def set_memory_mode(self, memory_config: MemoryMode | str):
         """
@@ -393,8 +747,7 @@ class SifiBridge:
         if isinstance(memory_config, str):
             memory_config = MemoryMode(memory_config)
 
-        self.__write(f"configure memory {memory_config.value}")
-        return self.get_data_with_key("configure")
+        return self.__configure(_MEMORY_MODE_COMMANDS[memory_config])
 
     def configure_emg(
         self,
@@ -416,11 +769,9 @@ class SifiBridge:
         else:
             notch_freq = "off"
 
-        self.set_filters(True)
-        self.__write(
+        return self.__configure_with_filters(
             f"configure emg {bandpass_freqs[0]} {bandpass_freqs[1]} {notch_freq}"
         )
-        return self.get_data_with_key("configure")
 
     def configure_ecg(self, bandpass_freqs: tuple = (0, 30)):
         """
@@ -430,9 +781,9 @@ class SifiBridge:
 
         :return: Configuration response
         """
-        self.set_filters(True)
-        self.__write(f"configure ecg {bandpass_freqs[0]} {bandpass_freqs[1]}")
-        return self.get_data_with_key("configure")
+        return self.__configure_with_filters(
+            f"configure ecg {bandpass_freqs[0]} {bandpass_freqs[1]}"
+        )
 
     def configure_eda(
         self,
@@ -447,11 +798,9 @@ class SifiBridge:
 
         :return: Configuration response
         """
-        self.set_filters(True)
-        self.__write(
+        return self.__configure_with_filters(
             f"configure eda {bandpass_freqs[0]} {bandpass_freqs[1]} {signal_freq}"
         )
-        return self.get_data_with_key("configure")
 
     def configure_ppg(
         self,
@@ -475,8 +824,7 @@ class SifiBridge:
         if isinstance(sens, str):
             sens = PpgSensitivity(sens)
 
-        self.__write(f"configure ppg {ir} {red} {green} {blue} {sens.value}")
-        return self.get_data_with_key("configure")
+        return self.__configure(f"configure ppg {ir} {red} {green} {blue} {sens.value}")
 
     def configure_sampling_freqs(self, ecg=500, emg=2000, eda=40, imu=50, ppg=50):
         """
@@ -486,8 +834,9 @@ class SifiBridge:
 
         :return: Configuration response
         """
-        self.__write(f"configure sampling-rates {ecg} {emg} {eda} {imu} {ppg}")
-        return self.get_data_with_key("configure")
+        return self.__configure(
+            f"configure sampling-rates {ecg} {emg} {eda} {imu} {ppg}"
+        )
 
     def set_low_latency_mode(self, on: bool):
         """
@@ -499,9 +848,7 @@ class SifiBridge:
 
         :return: Configuration response
         """
-        streaming = "on" if on else "off"
-        self.__write(f"configure low-latency-mode {streaming}")
-        return self.get_data_with_key("configure")
+        return self.__configure(_LOW_LATENCY_MODE_COMMANDS[bool(on)])
 
     def start_memory_download(self) -> int:
         """
@@ -518,10 +865,11 @@ class SifiBridge:
             raise ConnectionError(f"{self.active_device} is not connected")
 
         self.send_command(DeviceCommand.START_STATUS_UPDATE)
+        active_device = self.active_device
         kb_to_download = None
         while True:
             data = self.get_data()
-            if data["id"] != self.active_device or data["packet_type"] != "status":
+            if data["id"] != active_device or data["packet_type"] != "status":
                 continue
             if "memory_used_kbytes" not in data["data"].keys():
                 raise TypeError(
@@ -530,163 +878,541 @@ class SifiBridge:
             kb_to_download = data["data"]["memory_used_kbytes"][0]
             break
 
-        logging.info(f"kB to download: {kb_to_download}")
+        _log.info("kB to download: %s", kb_to_download)
 
         self.send_command(DeviceCommand.DOWNLOAD_ONBOARD_MEMORY)
 
         return kb_to_download
 
-    def send_command(self, command: DeviceCommand | str) -> bool:
+    def send_command(
+        self, command: DeviceCommand | str, timeout: float | None = None
+    ) -> bool | None:
         """
         Send a command to active device.
 
         :param command: Command to send
+        :param timeout: Maximum time to wait for SiFi Bridge's response, in seconds. `None` to wait indefinitely. Ignored inside `batch()`.
 
-        :return: True if command was sent successfully, False otherwise.
+        :return: True if command was sent successfully, False otherwise. `None` inside `batch()`.
+
+        :raise TimeoutError: If SiFi Bridge did not respond within `timeout`.
         """
         if isinstance(command, str):
             command = DeviceCommand(command)
 
-        self.__write(f"command {command.value}")
-        return self.get_data_with_key("command")["command"]["connected"]
+        resp = self.__request(
+            _COMMAND_BYTES[command], "command", batchable=True, timeout=timeout
+        )
+        return None if resp is None else resp["command"]["connected"]
 
-    def start(self) -> bool:
+    def start(self, timeout: float | None = None) -> bool:
         """
         Start an acquisition.
 
+        :param timeout: Maximum time to wait for SiFi Bridge's response, in seconds. `None` to wait indefinitely.
+
         :return: True if command was sent successfully, False otherwise.
 
         :raise ConnectionError: If unable to send the command, e.g. if disconnected.
+        :raise TimeoutError: If SiFi Bridge did not respond within `timeout`.
 
         """
-        return self.send_command(DeviceCommand.START_ACQUISITION)
+        return self.send_command(DeviceCommand.START_ACQUISITION, timeout)
 
-    def stop(self) -> bool:
+    def stop(self, timeout: float | None = None) -> bool:
         """
         Stop acquisition. Does not wait for confirmation, so ensure there is enough time (~1s) for the command to reach the BLE device before destroying Sifi Bridge instance.
 
+        :param timeout: Maximum time to wait for SiFi Bridge's response, in seconds. `None` to wait indefinitely.
+
         :return: True if command was sent successfully, False otherwise.
+
+        :raise TimeoutError: If SiFi Bridge did not respond within `timeout`.
+        """
+        return self.send_command(DeviceCommand.STOP_ACQUISITION, timeout)
+
+    def configure(self, **settings) -> list[dict]:
+        """
+        Apply several configurations in a single write to SiFi Bridge, waiting once for all their responses. See `batch()`.
+
+        Each keyword names a configuration method without its `set_` or `configure_` prefix. Its value is the method's argument, or a dictionary of the method's keyword arguments.
+
+        # Example
+
+        ```python
+        >>> responses = sb.configure(
+        ...     channels={"emg": True},
+        ...     emg={"bandpass_freqs": (20, 450), "notch_freq": 60},
+        ...     low_latency_mode=False,
+        ... )
+        >>> len(responses) # set_channels, set_filters, configure_emg, set_low_latency_mode
+        4
+        ```
+
+        :return: Configuration responses, in order.
+
+        :raise TypeError: If a keyword does not name a configuration method.
+        """
+        calls = []
+        for name, value in settings.items():
+            method = getattr(self, f"set_{name}", None) or getattr(
+                self, f"configure_{name}", None
+            )
+            if method is None:
+                raise TypeError(
+                    f"configure() got an unexpected keyword argument '{name}'"
+                )
+            calls.append((method, value))
+
+        with self.batch() as responses:
+            for method, value in calls:
+                if isinstance(value, dict):
+                    method(**value)
+                else:
+                    method(value)
+        return responses
+
+    @contextmanager
+    def batch(self):
+        """
+        Buffer the commands issued inside the `with` block and send them to SiFi Bridge in a single write when the block exits.
+
+        Inside the block, configuration methods (`set_*`, `configure_*`) and `send_command()` (thus `start()` and `stop()`) return `None`. Their responses are appended, in order, to the list returned by the context manager after the block exits.
+        Methods that need an immediate response, such as `connect()`, can't be used inside the block. If the block raises, the buffered commands are discarded.
+        A nested `batch()` joins the outer one: its commands are sent, and their responses collected, with the outer batch's.
+
+        # Example
+
+        ```python
+        >>> with sb.batch() as responses:
+        ...     sb.set_channels(emg=True)
+        ...     sb.configure_emg((20, 450), 60)
+        ...     sb.start()
+        >>> len(responses) # set_channels, set_filters, configure_emg, start
+        4
+        ```
         """
-        return self.send_command(DeviceCommand.STOP_ACQUISITION)
+        if self._batch is not None:
+            yield []
+            return
 
-    def get_data(self) -> dict:
+        responses = []
+        self._batch = []
+        self._batch_keys = []
+        try:
+            yield responses
+            lines, keys = self._batch, self._batch_keys
+        finally:
+            self._batch = None
+            self._batch_keys = []
+
+        waiters = [self.__await_response(key) for key in keys]
+        self._bridge.stdin.write(b"".join(lines))
+        self._bridge.stdin.flush()
+        for waiter in waiters:
+            responses.append(self.__wait_response(waiter))
+
+    def get_data(self, timeout: float | None = None) -> dict:
         """
         Wait for Bridge to return a packet. Blocking operation.
 
+        Packets already set aside by the `get_*()` sensor methods are not returned again.
+        Packets are read from SiFi Bridge in the background and queued until consumed. Past 65536 queued packets, the oldest are dropped, so keep consuming while streaming.
+
+        :param timeout: Maximum time to wait, in seconds. `None` to wait indefinitely.
+
         :return: Packet as a dictionary.
-        :raise
+
+        :raise TimeoutError: If no packet was received within `timeout`.
+        :raise BrokenPipeError: If SiFi Bridge exited and no more packets are queued.
         """
+        return _loads(self.__pop_line(_deadline(timeout)))
 
-        packet = self._bridge.stdout.readline().decode()
-        ret = json.loads(packet)
-        return ret
+    async def get_data_async(self, timeout: float | None = None) -> dict:
+        """
+        Wait for Bridge to return a packet without blocking the running event loop.
+
+        Packets are read by the same reader thread as `get_data()`, so several instances can be consumed from a single event loop without a thread per instance.
+        Commands are still sent synchronously, wrap them in `asyncio.to_thread()` if they must not block the loop.
+
+        :param timeout: Maximum time to wait, in seconds. `None` to wait indefinitely.
+
+        :return: Packet as a dictionary.
 
-    def get_data_with_key(self, keys: str | Iterable[str]) -> dict:
+        :raise TimeoutError: If no packet was received within `timeout`.
+        :raise BrokenPipeError: If SiFi Bridge exited and no more packets are queued.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        while True:
+            try:
+                return _loads(self._stdout.lines.popleft())
+            except IndexError:
+                pass
+            if self._stdout.closed:
+                raise BrokenPipeError("SiFi Bridge is not running")
+
+            ready = loop.create_future()
+            with self._stdout.waiters_lock:
+                self._stdout.lines_ready_async.append(ready)
+            # The reader may have queued lines before the future was registered
+            if self._stdout.lines or self._stdout.closed:
+                continue
+            try:
+                await asyncio.wait_for(
+                    ready, None if deadline is None else max(deadline - loop.time(), 0)
+                )
+            except asyncio.TimeoutError:
+                raise TimeoutError("No data received from SiFi Bridge") from None
+
+    def get_data_batch(
+        self, max_n: int = 64, timeout: float | None = None
+    ) -> list[dict]:
+        """
+        Wait for Bridge to return at least one packet, then return every queued packet, up to `max_n`. Blocking operation.
+
+        Consuming packets in batches amortizes the per-call overhead of `get_data()` on high-throughput loops, such as memory downloads.
+
+        :param max_n: Maximum number of packets to return.
+        :param timeout: Maximum time to wait for the first packet, in seconds. `None` to wait indefinitely.
+
+        :return: List of packets as dictionaries, oldest first.
+
+        :raise TimeoutError: If no packet was received within `timeout`.
+        :raise BrokenPipeError: If SiFi Bridge exited and no more packets are queued.
+        """
+        batch = [_loads(self.__pop_line(_deadline(timeout)))]
+        lines = self._stdout.lines
+        while len(batch) < max_n:
+            try:
+                line = lines.popleft()
+            except IndexError:
+                break
+            batch.append(_loads(line))
+        return batch
+
+    def get_data_with_key(
+        self, keys: str | Iterable[str], timeout: float | None = None
+    ) -> dict:
         """
         Wait for Bridge to return a packet with a specific key. Blocks until a packet is received and returns it as a dictionary.
 
         :param key: Key to wait for. If a string, will wait until the key is found. If an iterable, will wait until all keys are found.
+        :param timeout: Maximum time to wait, in seconds. `None` to wait indefinitely.
 
         :return: Packet with the requested key(s) as a dictionary.
+
+        :raise RuntimeError: If called inside `batch()`, since the batched commands have not been sent yet.
+        :raise TimeoutError: If no matching packet was received within `timeout`.
+        :raise BrokenPipeError: If SiFi Bridge exited and no more packets are queued.
         """
-        ret = dict()
-        if isinstance(keys, str):
-            while keys not in ret.keys():
-                ret = self.get_data()
-        elif isinstance(keys, Iterable):
+        if self._batch is not None:
+            raise RuntimeError("Can't wait for a response inside batch()")
+
+        keys = (keys,) if isinstance(keys, str) else tuple(keys)
+        # A packet can only match if every key appears in its raw line, so skip decoding the others
+        needles = tuple(f'"{k}"'.encode() for k in keys)
+        deadline = _deadline(timeout)
+        if len(keys) == 1:
+            # Common case: a single top-level key
+            key, needle = keys[0], needles[0]
             while True:
-                is_ok = False
-                ret = self.get_data()
-                tmp = ret.copy()
-                for i, k in enumerate(keys):
-                    if k not in tmp.keys():
-                        break
-                    elif i == len(keys) - 1:
-                        is_ok = True
-                    else:
-                        tmp = ret[k]
-                if is_ok:
-                    break
-        return ret
+                line = self.__pop_line(deadline)
+                if needle in line:
+                    ret = _loads(line)
+                    if key in ret:
+                        return ret
 
-    def get_ecg(self):
+        while True:
+            line = self.__pop_line(deadline)
+            if not all(needle in line for needle in needles):
+                continue
+            ret = _loads(line)
+            if _has_key_path(ret, keys):
+                return ret
+
+    def get_ecg(self, timeout: float | None = None):
         """
         Get ECG data.
 
+        :param timeout: Maximum time to wait, in seconds. `None` to wait indefinitely.
+
         :return: ECG data packet as a dictionary.
+
+        :raise TimeoutError: If no ECG packet was received within `timeout`.
         """
-        while True:
-            data = self.get_data_with_key(["packet_type"])
-            if data["packet_type"] == PacketType.ECG.value:
-                return data
+        return self.__get_packet(_ECG_PACKET_TYPES, _deadline(timeout))
 
-    def get_emg(self):
+    def get_emg(self, timeout: float | None = None):
         """
         Get EMG data.
 
+        :param timeout: Maximum time to wait, in seconds. `None` to wait indefinitely.
+
         :return: EMG data packet as a dictionary.
+
+        :raise TimeoutError: If no EMG packet was received within `timeout`.
         """
-        while True:
-            data = self.get_data_with_key(["packet_type"])
-            if data["packet_type"] in (
-                PacketType.EMG.value,
-                PacketType.EMG_ARMBAND.value,
-            ):
-                return data
+        return self.__get_packet(_EMG_PACKET_TYPES, _deadline(timeout))
 
-    def get_eda(self):
+    def get_eda(self, timeout: float | None = None):
         """
         Get EDA data.
 
+        :param timeout: Maximum time to wait, in seconds. `None` to wait indefinitely.
+
         :return: EDA data packet as a dictionary.
+
+        :raise TimeoutError: If no EDA packet was received within `timeout`.
         """
-        while True:
-            data = self.get_data_with_key(["packet_type"])
-            if data["packet_type"] == PacketType.EDA.value:
-                return data
+        return self.__get_packet(_EDA_PACKET_TYPES, _deadline(timeout))
 
-    def get_imu(self):
+    def get_imu(self, timeout: float | None = None):
         """
         Get IMU data.
 
+        :param timeout: Maximum time to wait, in seconds. `None` to wait indefinitely.
+
         :return: IMU data packet as a dictionary.
+
+        :raise TimeoutError: If no IMU packet was received within `timeout`.
         """
-        while True:
-            data = self.get_data_with_key(["packet_type"])
-            if data["packet_type"] == PacketType.IMU.value:
-                return data
+        return self.__get_packet(_IMU_PACKET_TYPES, _deadline(timeout))
 
-    def get_ppg(self):
+    def get_ppg(self, timeout: float | None = None):
         """
         Get PPG data.
 
+        :param timeout: Maximum time to wait, in seconds. `None` to wait indefinitely.
+
         :return: PPG data packet as a dictionary.
+
+        :raise TimeoutError: If no PPG packet was received within `timeout`.
         """
-        while True:
-            data = self.get_data_with_key(["packet_type"])
-            if data["packet_type"] == PacketType.PPG.value:
-                return data
+        return self.__get_packet(_PPG_PACKET_TYPES, _deadline(timeout))
 
-    def get_temperature(self):
+    def get_temperature(self, timeout: float | None = None):
         """
         Get temperature data.
 
+        :param timeout: Maximum time to wait, in seconds. `None` to wait indefinitely.
+
         :return: Temperature data packet as a dictionary.
+
+        :raise TimeoutError: If no temperature packet was received within `timeout`.
         """
+        return self.__get_packet(_TEMPERATURE_PACKET_TYPES, _deadline(timeout))
+
+    def get_packets(
+        self, packet_type: PacketType | str, n: int, timeout: float | None = None
+    ) -> list[dict]:
+        """
+        Wait for Bridge to return `n` packets of a given sensor type. Blocking operation.
+
+        Equivalent to calling the matching `get_*()` method `n` times, e.g. to accumulate a window of EMG data in a single call.
+
+        :param packet_type: Sensor packet type to get. Like `get_emg()`, `PacketType.EMG` and `PacketType.EMG_ARMBAND` both match either EMG packet type.
+        :param n: Number of packets to get.
+        :param timeout: Maximum time to wait for all `n` packets, in seconds. `None` to wait indefinitely.
+
+        :return: List of `n` packets as dictionaries, oldest first.
+
+        :raise ValueError: If `packet_type` is not a sensor packet type.
+        :raise PacketsTimeoutError: If fewer than `n` packets were received within `timeout`. Subclass of `TimeoutError`, the packets received so far are in its `packets` attribute.
+        :raise PacketsBrokenPipeError: If SiFi Bridge exited before `n` packets were received. Subclass of `BrokenPipeError`, the packets received so far are in its `packets` attribute.
+        """
+        packet_types = _SENSOR_PACKET_TYPES.get(PacketType(packet_type))
+        if packet_types is None:
+            raise ValueError(f"{packet_type} is not a sensor packet type")
+
+        deadline = _deadline(timeout)
+        packets = []
+        try:
+            for _ in range(n):
+                packets.append(self.__get_packet(packet_types, deadline))
+        except TimeoutError as e:
+            raise PacketsTimeoutError(str(e), packets) from e
+        except BrokenPipeError as e:
+            raise PacketsBrokenPipeError(str(e), packets) from e
+        return packets
+
+    def __configure(self, cmd: str | bytes) -> dict | None:
+        """Send the configuration command `cmd` and wait for its response. Batchable, see `batch()`.
+
+        :return: Configuration response, or `None` inside `batch()`.
+        """
+        return self.__request(cmd, "configure", batchable=True)
+
+    def __configure_with_filters(self, cmd: str) -> dict | None:
+        """Enable onboard filtering and send the configuration command `cmd`, in a single write.
+
+        :return: Response to `cmd`, or `None` inside `batch()`.
+        """
+        with self.batch() as responses:
+            self.set_filters(True)
+            self.__configure(cmd)
+        return responses[-1] if responses else None
+
+    def __request(
+        self,
+        cmd: str | bytes,
+        key: str,
+        batchable: bool = False,
+        timeout: float | None = None,
+    ) -> dict | None:
+        """Send a command and wait for its response.
+
+        The response is routed to this call by the reader thread, so the data packets received in the meantime stay queued for `get_data()`.
+
+        :param cmd: Command to send. `bytes` must already be encoded and newline-terminated.
+        :param key: Top-level key of the expected response.
+        :param batchable: If True, inside `batch()` the command is buffered and its response is deferred to the end of the batch.
+        :param timeout: Maximum time to wait for the response, in seconds. `None` to wait indefinitely. Ignored if deferred by `batch()`.
+
+        :return: Response as a dictionary, or `None` if deferred by `batch()`.
+
+        :raise RuntimeError: If called inside `batch()` and not `batchable`.
+        :raise TimeoutError: If no response was received within `timeout`.
+        """
+        line = cmd if isinstance(cmd, bytes) else f"{cmd}\n".encode()
+        if self._batch is not None:
+            if not batchable:
+                raise RuntimeError("Can't wait for a response inside batch()")
+            self.__write_bytes(line)
+            self._batch_keys.append(key)
+            return None
+
+        # Register before writing so that the response can't be missed
+        waiter = self.__await_response(key)
+        self.__write_bytes(line)
+        return self.__wait_response(waiter, _deadline(timeout))
+
+    def __await_response(self, key: str) -> _Waiter:
+        """Ask the reader thread to route the next packet with top-level `key` to a new waiter.
+
+        :return: Waiter to pass to `__wait_response()`.
+
+        :raise BrokenPipeError: If SiFi Bridge exited.
+        """
+        waiter = _Waiter(key)
+        with self._stdout.waiters_lock:
+            if self._stdout.closed:
+                raise BrokenPipeError("SiFi Bridge is not running")
+            self._stdout.waiters.append(waiter)
+        return waiter
+
+    def __wait_response(self, waiter: _Waiter, deadline: float | None = None) -> dict:
+        """Wait until the reader thread routes a response to `waiter`.
+
+        On timeout, `waiter` is marked as abandoned. See `_Stdout.route_responses()`.
+
+        :param deadline: `time.monotonic()` value after which to give up waiting. `None` to wait indefinitely.
+
+        :raise TimeoutError: If no response was received before `deadline`.
+        :raise BrokenPipeError: If SiFi Bridge exited before responding.
+        """
+        timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+        try:
+            resp = waiter.responses.get(timeout=timeout)
+        except queue.Empty:
+            with self._stdout.waiters_lock:
+                waiter.abandoned = True
+            raise TimeoutError("No response received from SiFi Bridge") from None
+        if resp is None:
+            raise BrokenPipeError("SiFi Bridge is not running")
+        return resp
+
+    def __get_packet(
+        self, packet_types: frozenset, deadline: float | None = None
+    ) -> dict:
+        """Wait for a packet whose `packet_type` is in `packet_types`.
+
+        Sensor packets of other types are set aside for the other `get_*()` methods, so that consumers of different sensors don't starve each other.
+
+        :param deadline: `time.monotonic()` value after which to give up waiting. `None` to wait indefinitely.
+
+        :return: Matching packet as a dictionary.
+        """
+        backlogs = self._sensor_backlogs
+        for packet_type in packet_types:
+            try:
+                return backlogs[packet_type].popleft()
+            except IndexError:
+                pass
+
         while True:
-            data = self.get_data_with_key(["packet_type"])
-            if data["packet_type"] == PacketType.TEMPERATURE.value:
+            data = _loads(self.__pop_line(deadline))
+            packet_type = data.get("packet_type")
+            if packet_type in packet_types:
                 return data
+            backlog = backlogs.get(packet_type)
+            if backlog is not None:
+                backlog.append(data)
+
+    def __pop_line(self, deadline: float | None = None) -> bytes:
+        """Pop the oldest line read from SiFi Bridge's stdout, waiting for the reader thread if none is queued.
+
+        :param deadline: `time.monotonic()` value after which to give up waiting. `None` to wait indefinitely.
 
-    def __write(self, cmd: str):
-        """Write some data to SiFi Bridge's stdin.
+        :raise TimeoutError: If no line was queued before `deadline`.
+        :raise BrokenPipeError: If SiFi Bridge exited and no more lines are queued.
+        """
+        while True:
+            try:
+                return self._stdout.lines.popleft()
+            except IndexError:
+                pass
+            self._stdout.lines_ready.clear()
+            # The reader may have queued lines between popleft() and clear()
+            if self._stdout.lines:
+                continue
+            if self._stdout.closed:
+                raise BrokenPipeError("SiFi Bridge is not running")
+            if deadline is None:
+                self._stdout.lines_ready.wait()
+            elif not self._stdout.lines_ready.wait(max(deadline - time.monotonic(), 0)):
+                raise TimeoutError("No data received from SiFi Bridge")
+
+    def __write_bytes(self, line: bytes):
+        """Write an already encoded, newline-terminated line to SiFi Bridge's stdin.
 
-        :param cmd: Message to write.
+        :param line: Line to write.
         """
-        logging.info(cmd)
-        self._bridge.stdin.write((f"{cmd}\n").encode())
+        if _log.isEnabledFor(logging.INFO):
+            _log.info(line[:-1].decode())
+        if self._batch is not None:
+            self._batch.append(line)
+            return
+        self._bridge.stdin.write(line)
         self._bridge.stdin.flush()
 
-    def __del__(self):
-        self.__write("quit")
+    def close(self):
+        """
+        Quit SiFi Bridge and wait for its process to exit. Calling it again does nothing.
+
+        Called automatically when leaving a `with` block, or when the instance is garbage-collected. Packets already read stay available to `get_data()`.
+        """
+        if self._bridge.stdin.closed:
+            return
+        try:
+            self._bridge.stdin.write(b"quit\n")
+            self._bridge.stdin.close()
+        except OSError:
+            # Already exited
+            pass
         self._bridge.terminate()
+        self._bridge.wait()
+        # The reader thread stops at EOF, which the process exiting just caused
+        self._reader.join(1)
+        self._bridge.stdout.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __del__(self):
+        # The constructor may have failed before starting SiFi Bridge
+        if hasattr(self, "_bridge"):
+            self.close()
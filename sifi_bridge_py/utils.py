@@ -1,6 +1,7 @@
 import os
 import requests
 import shutil
+import subprocess as sp
 from platform import system, machine
 from importlib import metadata
 
@@ -22,6 +23,32 @@ def _get_package_version():
     """
     return metadata.version("sifi_bridge_py")
 
+_cli_versions: dict[tuple[str, int], str] = {}
+"""
+Versions reported by `sifibridge -V`, keyed by executable path and modification time.
+"""
+
+def _get_cli_version(executable: str) -> str:
+    """
+    Get the version of the SiFi Bridge CLI at `executable`.
+
+    The version is only queried once per executable file, since doing so spawns a whole process. Replacing the file (e.g. updating it) invalidates the cached version.
+
+    :return str: Version string, or "0.0.1" if `executable` does not exist.
+    """
+    try:
+        key = (os.path.abspath(executable), os.stat(executable).st_mtime_ns)
+    except FileNotFoundError:
+        return "0.0.1"
+    if key not in _cli_versions:
+        _cli_versions[key] = (
+            sp.run([executable, "-V"], stdout=sp.PIPE)
+            .stdout.decode()
+            .strip()
+            .split(" ")[-1]
+        )
+    return _cli_versions[key]
+
 def _are_compatible(ver_1: str | Version, ver_2: str | Version) -> bool:
     """Check if two semantic verison-formatted strings are compatible (major and minor versions match).
 
@@ -119,6 +146,26 @@ def get_sifi_bridge(output_dir: str):
     exe = _download_and_extract_sifibridge(asset, output_dir)
     return exe
 
+def get_data_array(packet: dict, channels: list[str] | None = None) -> np.ndarray:
+    """
+    Stack the channels of a sensor data packet into a single array, in one conversion.
+
+    :param packet: Sensor data packet, as returned by `SifiBridge.get_*()`.
+    :param channels: Channels to stack, in order. `None` to stack every channel of the packet, in packet order.
+
+    :return: `float32` array of shape `(channels, samples)`, one row per channel.
+
+    :raises ValueError: If the channels don't all have the same number of samples.
+    """
+    data = packet["data"]
+    if channels is None:
+        channels = data.keys()
+    rows = [data[ch] for ch in channels]
+    if rows and any(len(row) != len(rows[0]) for row in rows):
+        lengths = {ch: len(row) for ch, row in zip(channels, rows)}
+        raise ValueError(f"Channels have different numbers of samples: {lengths}")
+    return np.array(rows, dtype=np.float32)
+
 def get_attitude_from_quats(qw, qx, qy, qz):
     """
     Calculate attitude from quaternions.
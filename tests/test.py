@@ -1,9 +1,13 @@
+import asyncio
+import os
 import unittest
+from unittest import mock
 
 import sifi_bridge_py as sbp
 from sifi_bridge_py.sifi_bridge import (
     BleTxPower,
     MemoryMode,
+    PacketType,
     PpgSensitivity,
 )
 
@@ -58,6 +62,47 @@ class TestSifiBridge(unittest.TestCase):
         self.sb.set_low_latency_mode(True)
         self.sb.set_low_latency_mode(False)
 
+    def test_batch(self):
+        with self.sb.batch() as responses:
+            self.sb.set_filters(True)
+            self.sb.set_low_latency_mode(False)
+            assert len(responses) == 0
+        assert len(responses) == 2
+        assert all("configure" in resp.keys() for resp in responses)
+
+    def test_configure(self):
+        responses = self.sb.configure(
+            channels={"emg": True},
+            emg={"bandpass_freqs": (20, 450), "notch_freq": 60},
+            low_latency_mode=False,
+        )
+        assert len(responses) == 4
+        assert all("configure" in resp.keys() for resp in responses)
+        with self.assertRaises(TypeError):
+            self.sb.configure(foo=True)
+
+    def test_get_data_timeout(self):
+        # Not streaming, so nothing should arrive
+        with self.assertRaises(TimeoutError):
+            self.sb.get_data(timeout=0.1)
+        with self.assertRaises(TimeoutError):
+            self.sb.get_ecg(timeout=0.1)
+        with self.assertRaises(TimeoutError):
+            asyncio.run(self.sb.get_data_async(timeout=0.1))
+        with self.assertRaises(TimeoutError):
+            self.sb.get_packets(PacketType.EMG, 4, timeout=0.1)
+        with self.assertRaises(ValueError):
+            self.sb.get_packets(PacketType.STATUS, 4)
+
+    def test_get_packets_timeout(self):
+        emg = b'{"packet_type":"emg","data":{"emg":[0.0]}}'
+        self.sb._stdout.queue_lines([emg] * 300)
+        with self.assertRaises(sbp.PacketsTimeoutError) as cm:
+            self.sb.get_packets(PacketType.EMG, 1000, timeout=0.1)
+        assert isinstance(cm.exception, TimeoutError)
+        # More than the sensor backlogs can hold, none may be lost
+        assert len(cm.exception.packets) == 300
+
     def test_list_devices(self):
         # self.sb.list_devices(sbp.ListSources.BLE) # could fail in runner?
         self.sb.list_devices(sbp.ListSources.DEVICES)
@@ -85,9 +130,38 @@ class TestSifiBridge(unittest.TestCase):
         test_device_name = "delete_device"
         self.sb.create_device(test_device_name, True)
         assert test_device_name in self.sb.list_devices(sbp.ListSources.DEVICES)
-        self.sb.delete_device(test_device_name)
+        active_device = self.sb.delete_device(test_device_name)
+        assert self.sb.active_device == active_device
         assert test_device_name not in self.sb.list_devices(sbp.ListSources.DEVICES)
 
+    def test_close(self):
+        with sbp.SifiBridge() as sb:
+            bridge = sb._bridge
+            assert bridge.poll() is None
+        assert bridge.poll() is not None
+        # No pipe or thread is left behind
+        assert bridge.stdin.closed and bridge.stdout.closed
+        assert not sb._reader.is_alive()
+        sb.close()
+
+    def test_version_check_not_skipped(self):
+        for value in ("", "0", "false"):
+            with mock.patch.dict(os.environ, {"SIFI_SKIP_VERSION_CHECK": value}):
+                with mock.patch(
+                    "sifi_bridge_py.utils._get_cli_version", side_effect=RuntimeError
+                ):
+                    with self.assertRaises(RuntimeError):
+                        sbp.SifiBridge()
+
+    def test_del_stops_bridge(self):
+        import gc
+
+        sb = sbp.SifiBridge()
+        bridge = sb._bridge
+        del sb
+        gc.collect()
+        assert bridge.wait(timeout=5) is not None
+
 
 if __name__ == "__main__":
     import logging
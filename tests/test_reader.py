@@ -0,0 +1,122 @@
+import io
+import random
+import unittest
+from unittest import mock
+
+from sifi_bridge_py._reader import read_lines
+from sifi_bridge_py.sifi_bridge import _Stdout, _Waiter
+
+
+class _ChunkedRaw(io.RawIOBase):
+    """
+    Raw stream returning `data` in random-sized chunks, like a pipe written to in bursts.
+    """
+
+    def __init__(self, data: bytes, rng: random.Random):
+        self._data = memoryview(data)
+        self._pos = 0
+        self._rng = rng
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        n = min(len(b), self._rng.randint(1, 64), len(self._data) - self._pos)
+        b[:n] = self._data[self._pos : self._pos + n]
+        self._pos += n
+        return n
+
+
+class TestReadLines(unittest.TestCase):
+    def test_random_chunks(self):
+        rng = random.Random(0)
+        for _ in range(200):
+            # Some lines are longer than the buffer, to force it to grow
+            expected = [
+                bytes(rng.choices(b"abc{}", k=rng.randint(0, 40)))
+                for _ in range(rng.randint(1, 50))
+            ]
+            data = b"".join(line + b"\n" for line in expected)
+            bursts = []
+            read_lines(_ChunkedRaw(data, rng), bursts.append, rng.randint(1, 16))
+            assert [line for burst in bursts for line in burst] == expected
+
+    def test_partial_last_line(self):
+        bursts = []
+        read_lines(io.BytesIO(b"a\nb\nincomplete"), bursts.append, 4)
+        assert [line for burst in bursts for line in burst] == [b"a", b"b"]
+
+
+class TestStdout(unittest.TestCase):
+    def test_route_nested_key(self):
+        stdout = _Stdout()
+        waiter = _Waiter("command")
+        stdout.waiters.append(waiter)
+        nested = b'{"packet_type":"status","data":{"command":"x"}}'
+        response = b'{"command":{"connected":true}}'
+        ecg = b'{"packet_type":"ecg"}'
+        stdout.queue_lines([nested, response, ecg])
+        assert waiter.responses.get_nowait() == {"command": {"connected": True}}
+        assert len(stdout.waiters) == 0
+        assert list(stdout.lines) == [nested, ecg]
+
+    def test_route_abandoned(self):
+        stdout = _Stdout()
+        abandoned, waiter = _Waiter("command"), _Waiter("command")
+        abandoned.abandoned = True
+        stdout.waiters.extend((abandoned, waiter))
+        stdout.queue_lines([b'{"command":{"connected":true}}'])
+        # A later request is waiting: the abandoned one no longer holds it back
+        assert waiter.responses.get_nowait() == {"command": {"connected": True}}
+        assert abandoned.responses.empty()
+        assert len(stdout.waiters) == 0
+
+    def test_route_late_response(self):
+        stdout = _Stdout()
+        abandoned = _Waiter("command")
+        abandoned.abandoned = True
+        stdout.waiters.append(abandoned)
+        stdout.queue_lines([b'{"command":{"connected":true}}'])
+        # Swallowed instead of reaching get_data()
+        assert len(stdout.lines) == 0
+        assert len(stdout.waiters) == 0
+
+    def test_route_not_a_response(self):
+        stdout = _Stdout()
+        waiter = _Waiter("command")
+        stdout.waiters.append(waiter)
+        lines = [b'{"command":', b'["command"]', b'"command"']
+        stdout.queue_lines(lines)
+        # Malformed or non-object lines are never responses
+        assert waiter.responses.empty()
+        assert list(stdout.lines) == lines
+
+    def test_route_decoder_error(self):
+        class DecodeError(Exception):
+            """Like msgspec.DecodeError, not a ValueError."""
+
+        stdout = _Stdout()
+        stdout.waiters.append(_Waiter("command"))
+        with mock.patch("sifi_bridge_py.sifi_bridge._loads", side_effect=DecodeError):
+            stdout.queue_lines([b'{"command":'])
+        assert list(stdout.lines) == [b'{"command":']
+
+    def test_reader_failure(self):
+        stdout = _Stdout()
+        waiter = _Waiter("command")
+        stdout.waiters.append(waiter)
+
+        def fail(lines):
+            raise RuntimeError("reader failure")
+
+        stdout.queue_lines = fail
+        with self.assertRaises(RuntimeError):
+            stdout.read(io.BytesIO(b'{"command":{}}\n'))
+        # Waiters and consumers are released, not left hanging
+        assert stdout.closed
+        assert waiter.responses.get_nowait() is None
+        assert len(stdout.waiters) == 0
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from multiprocessing import util
+
+import sifi_bridge_py as sbp
+from sifi_bridge_py import server
+
+
+@unittest.skipIf(sys.platform == "win32", "Unix sockets only")
+class TestServer(unittest.TestCase):
+    authkey = b"test"
+
+    @classmethod
+    def setUpClass(cls):
+        tmpdir = tempfile.mkdtemp()
+        # The server's listener unlinks its socket at exit: remove the directory after it
+        util.Finalize(None, shutil.rmtree, (tmpdir, True), exitpriority=-1)
+        cls.address = os.path.join(tmpdir, "sifibridge.sock")
+        threading.Thread(
+            target=server.serve,
+            args=(cls.authkey,),
+            kwargs={"address": cls.address},
+            daemon=True,
+        ).start()
+        deadline = time.monotonic() + 10
+        while not os.path.exists(cls.address):
+            assert time.monotonic() < deadline, "Server did not start"
+            time.sleep(0.05)
+
+    def test_round_trip(self):
+        client = server.BridgeClient(self.authkey, self.address)
+        assert "connected" in client.call("show").keys()
+        assert "configure" in client.call("set_filters", True).keys()
+        # Not streaming, so nothing should arrive
+        with self.assertRaises(TimeoutError):
+            client.get_data(timeout=0.1)
+        with self.assertRaises(TimeoutError):
+            client.get_data_batch(timeout=0.1)
+        client.close()
+
+    def test_remote_call_rejected(self):
+        client = server.BridgeClient(self.authkey, self.address)
+        with self.assertRaises(AttributeError):
+            client.call("get_data")
+        with self.assertRaises(AttributeError):
+            client.call("close")
+        client.close()
+
+    def test_closed_client(self):
+        client = server.BridgeClient(self.authkey, self.address)
+        client.close()
+        client.close()
+        with self.assertRaises(ValueError):
+            client.get_data(timeout=0.1)
+        with self.assertRaises(ValueError):
+            client.call("show")
+
+
+class TestHub(unittest.TestCase):
+    def test_bridge_exit(self):
+        bridge = sbp.SifiBridge()
+        hub = server._Hub(bridge, 16)
+        sid = hub.subscribe()
+        bridge.close()
+        with self.assertRaises(BrokenPipeError):
+            hub.get(sid, timeout=5)
+        # Every later call, and every later subscriber, sees the end of the stream too
+        with self.assertRaises(BrokenPipeError):
+            hub.get_batch(sid, timeout=5)
+        with self.assertRaises(BrokenPipeError):
+            hub.get(hub.subscribe(), timeout=5)
+
+    def test_unsubscribed(self):
+        with sbp.SifiBridge() as bridge:
+            hub = server._Hub(bridge, 16)
+            sid = hub.subscribe()
+            hub.unsubscribe(sid)
+            with self.assertRaises(ValueError):
+                hub.get(sid, timeout=0.1)
+            with self.assertRaises(ValueError):
+                hub.get_batch(sid, timeout=0.1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,32 @@
+import unittest
+
+import numpy as np
+
+from sifi_bridge_py import utils
+
+
+class TestGetDataArray(unittest.TestCase):
+    packet = {
+        "packet_type": "emg_armband",
+        "data": {"emg0": [1, 2, 3], "emg1": [4, 5, 6]},
+    }
+
+    def test_all_channels(self):
+        arr = utils.get_data_array(self.packet)
+        assert arr.dtype == np.float32
+        assert arr.shape == (2, 3)
+        assert arr.tolist() == [[1, 2, 3], [4, 5, 6]]
+
+    def test_selected_channels(self):
+        arr = utils.get_data_array(self.packet, ["emg1"])
+        assert arr.tolist() == [[4, 5, 6]]
+
+    def test_ragged_channels(self):
+        packet = {"data": {"ax": [1, 2], "ay": [1]}}
+        with self.assertRaises(ValueError) as cm:
+            utils.get_data_array(packet)
+        assert "different numbers of samples" in str(cm.exception)
+
+
+if __name__ == "__main__":
+    unittest.main()